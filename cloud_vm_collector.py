@@ -1,152 +1,561 @@
-import requests
+import argparse
+import asyncio
+import email.utils
+import functools
+import hashlib
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import re
+import threading
+import ahocorasick
+import hishel
+import hishel.httpx
+import httpx
+import ijson
+import orjson
 import pandas as pd
-import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
+import xlsxwriter
+from aiolimiter import AsyncLimiter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from itertools import islice
+from operator import itemgetter
 from tqdm import tqdm
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import json
+
+
+logger = logging.getLogger("cloud_vm_collector")  # __name__ is "__main__" when run as a script
+
+AZURE_PRICES_URL = "https://prices.azure.com/api/retail/prices"
+AZURE_API_VERSION = "2023-01-01-preview"
+AZURE_SERIES = "PTBDHF"  # single-char VM series after the "Standard_" SKU prefix
+_SKU_PREFIX = "Standard_"
+_SERIES_OFFSET = len(_SKU_PREFIX)
+_SERIES_CLAUSE = " or ".join(f"startswith(armSkuName,'{_SKU_PREFIX}{series}')" for series in AZURE_SERIES)
+AZURE_FILTER = f"serviceName eq 'Virtual Machines' and ({_SERIES_CLAUSE})"  # filtered server-side
+AZURE_PAGE_SIZE = 1000  # server default is 100 items per page
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_AFTER_STATUSES = (429, 503)  # statuses whose Retry-After header is honoured, as urllib3 does
+RATE_LIMIT_HEADER = "x-ms-ratelimit-remaining-subscription-reads"
+RATE_LIMIT_LOW_WATER = 20  # back off only when this few reads remain
+MAX_POLITE_DELAY = 2  # seconds
+AZURE_COLUMNS = (
+    "VM Name", "Product Name", "Location", "Unit Price (USD)", "Currency", "Meter Region",
+    "CPU Vendor", "Series", "Service Family", "Type", "Arm SKU",
+)
+AWS_PROCESSOR_COLUMNS = ("physical_processor", "processor", "Processor")  # instances.json uses the first
+CATEGORY_COLUMNS = ("Currency", "Series", "CPU Vendor", "Location", "Meter Region", "Service Family", "Type")
+_SERIES_PREFIX = frozenset(AZURE_SERIES)
+_SERIES_PATTERN = re.compile(r"[A-Z]+")  # the family letters after "Standard_": D, DC, FX, HB...
+_AZURE_FIELDS = (
+    "armSkuName", "productName", "armRegionName", "unitPrice",
+    "currencyCode", "meterRegion", "serviceFamily", "type",
+)
+_get_azure_fields = itemgetter(*_AZURE_FIELDS)
+AZURE_CACHE_FILE = "vm_cache_azure.sqlite"  # hishel keeps relative paths under .cache/hishel/
+AWS_CACHE_DIR = ".cache/aws"  # instances.json bodies and their ETags, one pair per URL
+AWS_INSTANCE_URLS = (
+    "https://ec2instances.info/instances.json",
+    "https://raw.githubusercontent.com/powdahound/ec2instances.info/master/www/instances.json",
+)
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip",
+    "Connection": "keep-alive",
+    "User-Agent": "cloud-vm-collector/1.0 (+https://github.com/Aromal004/VM-Recommendation-System)",
+}
+
+
+# ===========================================================
+# Helper: Build the vendor keyword automaton (one pass per string)
+# ===========================================================
+_VENDOR_KEYWORDS = (
+    ("amd", "AMD"), ("intel", "Intel"),
+    ("arm", "ARM"), ("ampere", "ARM"), ("graviton", "ARM"), ("apple", "ARM"), ("nvidia grace", "ARM"),
+)
+_VENDOR_ORDER = ("AMD", "Intel", "ARM")  # precedence when a string matches several vendors
+
+
+def _build_vendor_automaton():
+    automaton = ahocorasick.Automaton()
+    for keyword, vendor in _VENDOR_KEYWORDS:
+        automaton.add_word(keyword, vendor)
+    automaton.make_automaton()
+    return automaton
+
+
+_VENDOR_AUTOMATON = _build_vendor_automaton()
 
 
 # ===========================================================
 # Helper: Detect CPU vendor
 # ===========================================================
 def _extract_cpu_vendor(text):
-    text = str(text).lower()
-    if "amd" in text:
-        return "AMD"
-    elif "intel" in text:
-        return "Intel"
-    elif "arm" in text or "ampere" in text:
-        return "ARM"
-    else:
-        return "Unknown"
+    return _cpu_vendor_for(str(text))  # str() keeps the cache key hashable
+
+
+@functools.lru_cache(maxsize=4096)  # product names repeat across regions
+def _cpu_vendor_for(text):
+    found = {vendor for _, vendor in _VENDOR_AUTOMATON.iter(text.lower())}
+    return next((vendor for vendor in _VENDOR_ORDER if vendor in found), "Unknown")
+
+
+# ===========================================================
+# Helper: Detect CPU vendor for a whole column
+# ===========================================================
+def _extract_cpu_vendors(series):
+    text = series.fillna("").astype(str)
+    uniques = text.unique()  # each distinct processor string is scanned once
+    return text.map(dict(zip(uniques, map(_extract_cpu_vendor, uniques))))
+
+
+# ===========================================================
+# Helper: Store low-cardinality string columns as categoricals
+# ===========================================================
+def _compact_dtypes(df):
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
 
 
 # ===========================================================
 # Create resilient session with retries
 # ===========================================================
 def create_session():
+    # No response cache here: _fetch_aws_url keeps its own copy and revalidates it with the ETag (If-None-Match)
     session = requests.Session()
     retry_strategy = Retry(
         total=5,  # increased retries
-        status_forcelist=[429, 500, 502, 503, 504],
+        status_forcelist=list(RETRY_STATUSES),
         allowed_methods=["GET"],
         backoff_factor=5,  # exponential wait between retries
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    # One pooled, keep-alive adapter so every request reuses its TCP/TLS connection
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry_strategy)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
     return session
 
 
 # ===========================================================
-# Fetch Azure VM retail pricing
+# Helper: Only successful Azure pages go into the cache
+# ===========================================================
+class _OkResponseFilter(hishel.BaseFilter):
+    def needs_body(self):
+        return False
+
+    def apply(self, item, body):
+        return item.status_code == 200
+
+
+# ===========================================================
+# Create cached HTTP/2 async client for the Azure feed
+# ===========================================================
+def create_async_session():
+    # HTTP/2 multiplexes the concurrent page requests over a few TLS connections
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+    )
+    # The API sends no cache headers, so cache by filter (200 responses only) rather than by the spec
+    cache_transport = hishel.httpx.AsyncCacheTransport(
+        next_transport=transport,
+        storage=hishel.AsyncSqliteStorage(database_path=AZURE_CACHE_FILE, default_ttl=3600),  # keep pages for an hour
+        policy=hishel.FilterPolicy(response_filters=[_OkResponseFilter()]),
+    )
+    # Connection is a hop-by-hop header and not allowed over HTTP/2
+    headers = {"User-Agent": DEFAULT_HEADERS["User-Agent"]}
+    return httpx.AsyncClient(transport=cache_transport, timeout=60, headers=headers)
+
+
+# ===========================================================
+# Helper: Retry-After in seconds, and the politeness delay derived from Azure rate-limit headers
+# ===========================================================
+def _retry_after(headers):
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)  # HTTP-date form
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _rate_limit_delay(headers):
+    try:
+        remaining = int(headers.get(RATE_LIMIT_HEADER, "100"))
+    except ValueError:
+        return 0
+    if remaining >= RATE_LIMIT_LOW_WATER:
+        return 0
+    retry_after = _retry_after(headers)
+    return min(MAX_POLITE_DELAY, 1 if retry_after is None else retry_after)
+
+
+# ===========================================================
+# Fetch a single Azure pricing page (async, with retries)
+# ===========================================================
+async def _fetch_azure_page(session, skip, semaphore, limiter, retries=5, backoff_factor=5):
+    params = {
+        "api-version": AZURE_API_VERSION,
+        "$top": str(AZURE_PAGE_SIZE),
+        "$filter": AZURE_FILTER,
+        "$skip": str(skip),
+    }
+    for attempt in range(retries + 1):
+        delay = None
+        try:
+            async with semaphore, limiter:
+                response = await session.get(AZURE_PRICES_URL, params=params)
+                delay = _rate_limit_delay(response.headers)
+                if delay:
+                    await asyncio.sleep(delay)  # hold the slot so the whole batch slows down
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                response.raise_for_status()
+                return orjson.loads(response.content)
+            if response.status_code in RETRY_AFTER_STATUSES:
+                delay = _retry_after(response.headers)  # the server's own wait beats our backoff
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+        if delay is None:
+            delay = backoff_factor * 2 ** attempt  # exponential wait between retries
+        await asyncio.sleep(delay)
+
+
+# ===========================================================
+# Schedule a batch of Azure pages; returns a future of the results
+# ===========================================================
+def _fetch_azure_batch(session, skips, semaphore, limiter):
+    return asyncio.gather(
+        *(_fetch_azure_page(session, skip, semaphore, limiter) for skip in skips),
+        return_exceptions=True,
+    )
+
+
+# ===========================================================
+# Helper: $skip offsets for the next `pages` pages after a batch
+# ===========================================================
+def _next_azure_skips(skips, page_size, pages):
+    next_skip = skips[-1] + page_size
+    return [next_skip + i * page_size for i in range(pages)]
+
+
 # ===========================================================
-def fetch_azure_vm_pricing(limit=2000, session=None):
-    if session is None:
-        session = create_session()
+# Keep only the VM series we are interested in (appends to column buffers)
+# ===========================================================
+def _is_wanted_sku(item):
+    sku = item.get("armSkuName") or ""
+    return sku[_SERIES_OFFSET:_SERIES_OFFSET + 1] in _SERIES_PREFIX and sku.startswith(_SKU_PREFIX)
+
+
+def _sku_series(sku):
+    match = _SERIES_PATTERN.match(sku, _SERIES_OFFSET)
+    return match.group() if match else ""
+
+
+def _filter_azure_items(items, remaining, cols):
+    matched = list(islice(filter(_is_wanted_sku, items), remaining))
+    if not matched:
+        return 0
 
+    try:
+        rows = list(map(_get_azure_fields, matched))
+    except KeyError:  # an item is missing a field; fall back to .get for this page
+        rows = [tuple(item.get(field) for field in _AZURE_FIELDS) for item in matched]
+
+    skus, products, locations, prices, currencies, regions, families, types = zip(*rows)
+    cols["VM Name"].extend(skus)
+    cols["Product Name"].extend(products)
+    cols["Location"].extend(locations)
+    cols["Unit Price (USD)"].extend(prices)
+    cols["Currency"].extend(currencies)
+    cols["Meter Region"].extend(regions)
+    cols["CPU Vendor"].extend(map(_extract_cpu_vendor, products))
+    cols["Series"].extend(map(_sku_series, skus))
+    cols["Service Family"].extend(families)
+    cols["Type"].extend(types)
+    cols["Arm SKU"].extend(skus)
+    return len(rows)
+
+
+# ===========================================================
+# Fetch Azure VM retail pricing
+# ===========================================================
+async def fetch_azure_vm_pricing(session, limit=2000, concurrency=16, requests_per_second=10):
     print("\n🔹 Fetching Azure VM retail pricing data...")
-    base_url = "https://prices.azure.com/api/retail/prices?$filter=serviceName eq 'Virtual Machines'"
-    next_page = base_url
-    all_items = []
-    series_filter = ("P", "T", "B", "D", "H", "F")
+    cols = {name: [] for name in AZURE_COLUMNS}  # column buffers instead of a list of row dicts
+    collected = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = AsyncLimiter(requests_per_second, 1)  # hard cap; _rate_limit_delay adds backoff when needed
     page = 0
 
     with tqdm(desc="Downloading Azure VM pages", unit="page") as pbar:
-        while next_page and len(all_items) < limit:
-            try:
-                response = session.get(next_page, timeout=60)
-                response.raise_for_status()
-                data = response.json()
+        # The first page tells us the page size, so the following $skip offsets can be requested in parallel
+        skips = [0]
+        page_size = None
+        pending = _fetch_azure_batch(session, skips, semaphore, limiter)
+        done = False
+
+        while pending is not None and not done:
+            results = await pending
+            pending = None
+
+            if page_size is None and isinstance(results[0], dict):
+                page_size = len(results[0].get("Items", []))
+
+            last = results[-1]
+            more_pages = bool(page_size) and isinstance(last, dict) and bool(last.get("NextPageLink"))
+
+            # Prefetch the next batch before filtering this one, so its round trip overlaps our work.
+            # Only ask for the pages still needed once this batch is in, never more than `concurrency`.
+            if more_pages:
+                pages = math.ceil((limit - collected) / page_size) - len(results)
+                if pages > 0:
+                    skips = _next_azure_skips(skips, page_size, min(concurrency, pages))
+                    pending = _fetch_azure_batch(session, skips, semaphore, limiter)
+                    await asyncio.sleep(0)  # let the prefetch requests go out
+
+            for data in results:
+                if isinstance(data, Exception):
+                    logger.warning(f"  ⚠️ Error fetching Azure data: {data}")
+                    done = True
+                    break
 
                 items = data.get("Items", [])
-                filtered_items = []
-
-                for item in items:
-                    if len(all_items) >= limit:
-                        break
-                    sku = item.get("armSkuName", "")
-                    if sku and any(sku.startswith(prefix) for prefix in series_filter):
-                        filtered_items.append({
-                            "VM Name": sku,
-                            "Product Name": item.get("productName"),
-                            "Location": item.get("armRegionName"),
-                            "Unit Price (USD)": item.get("unitPrice"),
-                            "Currency": item.get("currencyCode"),
-                            "Meter Region": item.get("meterRegion"),
-                            "CPU Vendor": _extract_cpu_vendor(item.get("productName", "")),
-                            "Series": sku[:2] if len(sku) > 1 else sku,
-                            "Service Family": item.get("serviceFamily"),
-                            "Type": item.get("type"),
-                            "Arm SKU": sku
-                        })
-
-                all_items.extend(filtered_items)
+                filtered = _filter_azure_items(items, limit - collected, cols)
+                collected += filtered
                 page += 1
-                tqdm.write(f"  ✓ Page {page}: {len(filtered_items)} filtered / {len(items)} total")
+                logger.info(f"  ✓ Page {page}: {filtered} filtered / {len(items)} total")
                 pbar.update(1)
 
-                next_page = data.get("NextPageLink")
-                if not next_page or len(all_items) >= limit:
+                if not data.get("NextPageLink") or not items or collected >= limit:
+                    done = True
                     break
-                time.sleep(1.5)  # polite delay
 
-            except requests.exceptions.Timeout:
-                tqdm.write(f"  ⚠️ Timeout on page {page + 1}, retrying next page...")
-                continue
-            except Exception as e:
-                tqdm.write(f"  ⚠️ Error fetching Azure data: {e}")
-                break
+            # Some rows were dropped client-side, so the prefetch fell short of the limit
+            if not done and pending is None and more_pages:
+                pages = min(concurrency, math.ceil((limit - collected) / page_size))
+                skips = _next_azure_skips(skips, page_size, pages)
+                pending = _fetch_azure_batch(session, skips, semaphore, limiter)
+
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
 
-    print(f"✅ Azure VM records collected: {len(all_items)}")
-    return pd.DataFrame(all_items)
+    print(f"✅ Azure VM records collected: {collected}")
+    return _compact_dtypes(pd.DataFrame(cols, copy=False))
 
 
 # ===========================================================
-# Fetch AWS EC2 instance data
+# Helper: Collect streamed row dicts into column lists
 # ===========================================================
-def fetch_aws_instances(session=None):
-    if session is None:
-        session = create_session()
+def _rows_to_columns(rows):
+    cols = {}
+    count = 0
+    for row in rows:
+        for key, value in row.items():
+            column = cols.get(key)
+            if column is None:
+                column = cols[key] = [None] * count  # key first seen on this row
+            column.append(value)
+        count += 1
+        for column in cols.values():
+            if len(column) < count:
+                column.append(None)  # key missing from this row
+    return cols, count
 
-    print("\n🔹 Fetching AWS EC2 instance data...")
 
-    urls = [
-        "https://ec2instances.info/instances.json",
-        "https://raw.githubusercontent.com/powdahound/ec2instances.info/master/www/instances.json",
-    ]
+# ===========================================================
+# Helper: Read just enough of a JSON stream to see its first token
+# ===========================================================
+def _read_json_head(raw, size=64):
+    head = b""
+    while not head.lstrip():
+        chunk = raw.read(size)
+        if not chunk:
+            break
+        head += chunk
+    return head
 
-    for url in urls:
+
+# ===========================================================
+# Helper: File-like view of an already-read head plus the rest of a stream
+#         (reads end early once `stop` is set; everything read is copied to `sink`)
+# ===========================================================
+class _Stopped(Exception):
+    pass
+
+
+class _PrefixedReader:
+    def __init__(self, head, raw, stop=None, sink=None):
+        self._head = head
+        self._raw = raw
+        self._stop = stop
+        self._sink = sink
+
+    def read(self, size=-1):
+        if self._stop is not None and self._stop.is_set():
+            raise _Stopped()
+        chunk = self._read(size)
+        if self._sink is not None:
+            self._sink.write(chunk)
+        return chunk
+
+    def _read(self, size):
+        if not self._head:
+            return self._raw.read(size)
+        if size is None or size < 0:
+            chunk, self._head = self._head, b""
+            return chunk + self._raw.read()
+        chunk, self._head = self._head[:size], self._head[size:]  # ijson probes with read(0)
+        return chunk
+
+
+# ===========================================================
+# Helper: Stream-parse an instances.json body into column lists
+# ===========================================================
+def _read_instances(raw, stop=None, sink=None):
+    head = _read_json_head(raw)
+    stream = _PrefixedReader(head, raw, stop, sink)
+
+    # instances.json is a list of instances; older dumps map instance type -> instance
+    if head.lstrip()[:1] == b"{":
+        rows = (instance for _, instance in ijson.kvitems(stream, "", use_float=True))
+    else:
+        rows = ijson.items(stream, "item", use_float=True)
+    cols, count = _rows_to_columns(rows)
+
+    if sink is not None:
+        for _ in iter(functools.partial(stream.read, 64 * 1024), b""):
+            pass  # copy any trailing bytes ijson left unread
+    return cols, count
+
+
+# ===========================================================
+# Helper: Where one URL's cached body and ETag live
+# ===========================================================
+def _aws_cache_paths(url):
+    base = os.path.join(AWS_CACHE_DIR, hashlib.sha256(url.encode()).hexdigest()[:16])
+    return base + ".json", base + ".etag"
+
+
+def _read_cached_instances(body_path, stop=None):
+    with open(body_path, "rb") as f:
+        return _read_instances(f, stop)
+
+
+def _download_instances(session, url, body_path, etag_path, stop=None):
+    headers = {}
+    if os.path.exists(body_path) and os.path.exists(etag_path):
+        with open(etag_path) as f:
+            headers["If-None-Match"] = f.read()
+
+    with session.get(url, stream=True, timeout=60, headers=headers) as response:
+        if stop is not None and stop.is_set():
+            return None  # another URL already won; don't download the body
+        if response.status_code == 304:
+            return _read_cached_instances(body_path, stop)
+        response.raise_for_status()
+        response.raw.decode_content = True
+
+        # Parse while downloading; the copy replaces the cached body only once it is complete
+        os.makedirs(AWS_CACHE_DIR, exist_ok=True)
+        part_path = body_path + ".part"
         try:
-            print(f"  📍 Trying: {url}")
-            response = session.get(url, timeout=60)
-            response.raise_for_status()
-            data = response.json()
+            with open(part_path, "wb") as sink:
+                result = _read_instances(response.raw, stop, sink)
+        except BaseException:
+            os.remove(part_path)
+            raise
+        os.replace(part_path, body_path)
+
+        etag = response.headers.get("ETag")
+        if etag:
+            with open(etag_path, "w") as f:
+                f.write(etag)
+        elif os.path.exists(etag_path):
+            os.remove(etag_path)
+    return result
 
-            if isinstance(data, dict):
-                instances = list(data.values())
-            else:
-                instances = data
 
-            if not instances:
-                continue
+# ===========================================================
+# Fetch AWS EC2 instance data from one URL (streamed parse)
+# ===========================================================
+def _fetch_aws_url(session, url, stop=None):
+    body_path, etag_path = _aws_cache_paths(url)
+    try:
+        result = _download_instances(session, url, body_path, etag_path, stop)
+    except requests.RequestException as e:
+        if not os.path.exists(body_path):
+            raise
+        logger.warning(f"  ⚠️ {url} failed ({type(e).__name__}); using the cached copy")
+        result = _read_cached_instances(body_path, stop)
+
+    if result is None:
+        return None
+    cols, count = result
+    if not count:
+        return None
+
+    df = pd.DataFrame(cols, copy=False)
+
+    processor_column = next((column for column in AWS_PROCESSOR_COLUMNS if column in df.columns), None)
+    if processor_column is not None:
+        df["CPU Vendor"] = _extract_cpu_vendors(df[processor_column])
+    else:
+        df["CPU Vendor"] = "Unknown"
+
+    return _compact_dtypes(df)
+
+
+# ===========================================================
+# Fetch AWS EC2 instance data (all URLs raced, first success wins)
+# ===========================================================
+def fetch_aws_instances(session, urls=AWS_INSTANCE_URLS):
+    print("\n🔹 Fetching AWS EC2 instance data...")
+
+    executor = ThreadPoolExecutor(max_workers=len(urls))
+    stop = threading.Event()
+    futures = {}
+    for url in urls:
+        print(f"  📍 Trying: {url}")
+        futures[executor.submit(_fetch_aws_url, session, url, stop)] = url
 
-            df = pd.DataFrame(instances)
+    try:
+        for future in as_completed(futures):
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"  ⚠️ Failed {futures[future]} ({type(e).__name__}): {str(e)[:100]}")
+                continue
 
-            if "processor" in df.columns:
-                df["CPU Vendor"] = df["processor"].apply(lambda x: _extract_cpu_vendor(x))
-            elif "Processor" in df.columns:
-                df["CPU Vendor"] = df["Processor"].apply(lambda x: _extract_cpu_vendor(x))
-            else:
-                df["CPU Vendor"] = "Unknown"
+            if df is None:
+                continue
 
             print(f"✅ AWS instances collected: {len(df)}")
             return df
-
-        except Exception as e:
-            print(f"  ⚠️ Failed ({type(e).__name__}): {str(e)[:100]}")
-            continue
+    finally:
+        # Downloads are streamed, not buffered by a cache layer, so a loser stops at its next 64 KiB read.
+        # One still waiting for response headers runs until it gets them or times out
+        # (60 s plus retries); interpreter exit joins it.
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
     print("⚠️ Could not fetch AWS data.")
     return pd.DataFrame()
@@ -168,15 +577,115 @@ def create_sample_coremark_data():
     }
 
     df = pd.DataFrame(sample_data)
-    df["CPU Vendor"] = df["CPU"].apply(lambda x: _extract_cpu_vendor(x))
+    df["CPU Vendor"] = _extract_cpu_vendors(df["CPU"])
+    df = _compact_dtypes(df)
     print(f"✅ CoreMark entries: {len(df)}")
     return df
 
 
+# ===========================================================
+# Helper: Make object columns Arrow can't type (nested dicts, mixed scalars) into strings
+# ===========================================================
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _to_arrow_compatible(df):
+    converted = {}
+    for column in df.columns:
+        values = df[column]
+        if values.dtype != object:
+            continue
+        if values.map(lambda value: isinstance(value, (dict, list))).any():
+            # e.g. AWS pricing, which nests empty {} structs Parquet cannot store
+            converted[column] = values.map(lambda value: None if _is_missing(value) else orjson.dumps(value).decode())
+        elif pd.api.types.infer_dtype(values, skipna=True) in ("mixed", "mixed-integer"):
+            converted[column] = values.map(lambda value: None if _is_missing(value) else str(value))
+    return df.assign(**converted) if converted else df
+
+
+# ===========================================================
+# Write a DataFrame to a zstd-compressed Parquet file
+# ===========================================================
+def write_parquet(df, path):
+    table = pa.Table.from_pandas(_to_arrow_compatible(df), preserve_index=False)
+    pq.write_table(table, path, compression="zstd")
+
+
+# ===========================================================
+# Helper: Make a cell value writable by xlsxwriter
+# ===========================================================
+def _excel_value(value):
+    if isinstance(value, (dict, list, tuple, set)):
+        return str(value)  # nested AWS fields (e.g. pricing)
+    if pd.isna(value):
+        return None
+    return value
+
+
+# ===========================================================
+# Write one sheet in row chunks (rows must go out in order)
+# ===========================================================
+def _write_excel_sheet(workbook, sheet_name, df, chunk_size=500):
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(column) for column in df.columns])
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        for row_num, row in enumerate(chunk.itertuples(index=False, name=None), start=start + 1):
+            worksheet.write_row(row_num, 0, [_excel_value(value) for value in row])
+
+
+# ===========================================================
+# Write all sheets into a single Excel workbook
+# ===========================================================
+def write_excel(outputs, output_file):
+    # constant_memory flushes each finished row to disk instead of keeping every cell in memory
+    with xlsxwriter.Workbook(output_file, {"constant_memory": True}) as workbook:
+        for label, sheet_name, _, df in outputs:
+            if not df.empty:
+                _write_excel_sheet(workbook, sheet_name, df)
+                print(f"  📊 {label} sheet: {len(df)} rows")
+
+
+# ===========================================================
+# Logging: records are queued and written by a listener thread
+# ===========================================================
+class _TqdmHandler(logging.Handler):
+    def emit(self, record):
+        try:
+            tqdm.write(self.format(record))  # clears and redraws the progress bar around the line
+        except Exception:
+            self.handleError(record)
+
+
+def setup_logging():
+    # Only this module's logger; the root logger stays unconfigured so httpx keeps its INFO lines quiet
+    log_queue = queue.SimpleQueue()
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, _TqdmHandler())
+    listener.start()
+    return listener
+
+
+# ===========================================================
+# Command line options
+# ===========================================================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect cloud VM pricing and benchmark data.")
+    parser.add_argument(
+        "--xlsx",
+        action="store_true",
+        help="write a single Excel workbook (cloud_vm_benchmarks.xlsx) instead of Parquet files",
+    )
+    return parser.parse_args(argv)
+
+
 # ===========================================================
 # Main execution
 # ===========================================================
-def main():
+async def main(args):
     session = create_session()
 
     print("=" * 65)
@@ -184,36 +693,40 @@ def main():
     print("=" * 65)
 
     # --- Fetch Data ---
-    azure_df = fetch_azure_vm_pricing(limit=2000, session=session)
-    aws_df = fetch_aws_instances(session=session)
+    async with create_async_session() as azure_session:
+        azure_df = await fetch_azure_vm_pricing(azure_session, limit=2000)
+    aws_df = fetch_aws_instances(session)
     coremark_df = create_sample_coremark_data()
 
+    outputs = [
+        ("Azure", "Azure_VMs", "azure_vms", azure_df),
+        ("AWS", "AWS_VMs", "aws_vms", aws_df),
+        ("CoreMark", "CoreMark_Scores", "coremark_scores", coremark_df),
+    ]
+
     # --- Save Results ---
-    output_file = "cloud_vm_benchmarks.xlsx"
     try:
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            if not azure_df.empty:
-                azure_df.to_excel(writer, sheet_name="Azure_VMs", index=False)
-                print(f"  📊 Azure sheet: {len(azure_df)} rows")
-            if not aws_df.empty:
-                aws_df.to_excel(writer, sheet_name="AWS_VMs", index=False)
-                print(f"  📊 AWS sheet: {len(aws_df)} rows")
-            if not coremark_df.empty:
-                coremark_df.to_excel(writer, sheet_name="CoreMark_Scores", index=False)
-                print(f"  📊 CoreMark sheet: {len(coremark_df)} rows")
-
-        print("\n🎉 Data collection complete!")
-        print(f"📁 Output file: {output_file}")
+        if args.xlsx:
+            output_file = "cloud_vm_benchmarks.xlsx"
+            write_excel(outputs, output_file)
+            print("\n🎉 Data collection complete!")
+            print(f"📁 Output file: {output_file}")
+        else:
+            written = []
+            for label, _, base_name, df in outputs:
+                if not df.empty:
+                    write_parquet(df, f"{base_name}.parquet")
+                    written.append(f"{base_name}.parquet")
+                    print(f"  📊 {label} file: {len(df)} rows")
+            print("\n🎉 Data collection complete!")
+            print(f"📁 Output files: {', '.join(written)}")
 
     except Exception as e:
-        print(f"\n⚠️ Excel write error: {e}")
+        print(f"\n⚠️ Write error: {e}")
         print("Saving CSV backups...")
-        if not azure_df.empty:
-            azure_df.to_csv("azure_vms.csv", index=False)
-        if not aws_df.empty:
-            aws_df.to_csv("aws_vms.csv", index=False)
-        if not coremark_df.empty:
-            coremark_df.to_csv("coremark_scores.csv", index=False)
+        for _, _, base_name, df in outputs:
+            if not df.empty:
+                df.to_csv(f"{base_name}.csv", index=False)
         print("✅ CSV backups saved.")
 
 
@@ -221,4 +734,8 @@ def main():
 # Entry point
 # ===========================================================
 if __name__ == "__main__":
-    main()
+    log_listener = setup_logging()
+    try:
+        asyncio.run(main(parse_args()))
+    finally:
+        log_listener.stop()
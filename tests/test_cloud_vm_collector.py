@@ -0,0 +1,299 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import orjson
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import cloud_vm_collector as collector
+
+
+INSTANCES = [
+    {"instance_type": "m7g.large", "physical_processor": "AWS Graviton3 Processor", "vCPU": 2, "memory": 8.0},
+    {"instance_type": "m7i.large", "physical_processor": "Intel Xeon Platinum 8488C", "vCPU": 2, "memory": 8.0},
+    {"instance_type": "m7a.large", "physical_processor": "AMD EPYC 9R14 Processor", "vCPU": 2},
+]
+
+BODIES = {
+    "/list.json": json.dumps(INSTANCES, indent=2).encode(),
+    "/dict.json": b"\n " + json.dumps({row["instance_type"]: row for row in INSTANCES}).encode(),
+    "/empty.json": b"[]",
+}
+SLOW_BODY = json.dumps(INSTANCES * 4000).encode()  # ~1 MB, sent in slices
+SLOW_SLICE = 96 * 1024  # bigger than one parser read, so each slice completes a read
+SLOW_DELAY = 0.2
+etag_state = {"status": 200, "if_none_match": []}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == "/slow.json":
+            self._send_slowly()
+            return
+        if path == "/etag.json":
+            self._send_with_etag()
+            return
+        body = BODIES.get(path)
+        if body is None:
+            self.send_error(404)
+            return
+        gzipped = "gzip" in query
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_slowly(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(SLOW_BODY)))
+        self.end_headers()
+        try:
+            for start in range(0, len(SLOW_BODY), SLOW_SLICE):
+                self.wfile.write(SLOW_BODY[start:start + SLOW_SLICE])
+                self.wfile.flush()
+                time.sleep(SLOW_DELAY)
+        except OSError:
+            pass  # the client hung up
+
+    def _send_with_etag(self):
+        etag_state["if_none_match"].append(self.headers.get("If-None-Match"))
+        if etag_state["status"] != 200:
+            self.send_error(etag_state["status"])
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        body = BODIES["/list.json"]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # keep the cached instances.json copies out of the repo
+    session = collector.create_session()
+    yield session
+    session.close()
+
+
+@pytest.mark.parametrize("path", ["/list.json", "/dict.json", "/list.json?gzip"])
+def test_fetch_aws_url_parses_local_response(server_url, session, path):
+    df = collector._fetch_aws_url(session, server_url + path)
+
+    assert list(df["instance_type"]) == ["m7g.large", "m7i.large", "m7a.large"]
+    assert list(df["CPU Vendor"]) == ["ARM", "Intel", "AMD"]
+    assert df["memory"].isna().tolist() == [False, False, True]
+
+
+def test_fetch_aws_url_empty_dump(server_url, session):
+    assert collector._fetch_aws_url(session, server_url + "/empty.json") is None
+
+
+def test_fetch_aws_url_skips_body_once_stopped(server_url, session):
+    stop = threading.Event()
+    stop.set()
+    assert collector._fetch_aws_url(session, server_url + "/list.json", stop) is None
+
+
+def test_fetch_aws_url_stops_mid_body(server_url, session, monkeypatch):
+    stop = threading.Event()
+    reading_body = threading.Event()
+    errors = []
+    read_json_head = collector._read_json_head
+
+    def read_head_then_signal(raw):
+        head = read_json_head(raw)
+        reading_body.set()
+        return head
+
+    def fetch():
+        try:
+            collector._fetch_aws_url(session, server_url + "/slow.json", stop)
+        except Exception as e:
+            errors.append(e)
+
+    monkeypatch.setattr(collector, "_read_json_head", read_head_then_signal)
+    thread = threading.Thread(target=fetch)
+    started = time.monotonic()
+    thread.start()
+    assert reading_body.wait(5)
+    stop.set()
+    thread.join(10)
+
+    full_body_time = len(SLOW_BODY) // SLOW_SLICE * SLOW_DELAY
+    assert not thread.is_alive()
+    assert time.monotonic() - started < full_body_time / 2
+    assert [type(e) for e in errors] == [collector._Stopped]
+    assert not os.listdir(collector.AWS_CACHE_DIR)  # no partial copy left behind
+
+
+def test_fetch_aws_url_revalidates_with_etag(server_url, session):
+    etag_state.update(status=200, if_none_match=[])
+    url = server_url + "/etag.json"
+
+    first = collector._fetch_aws_url(session, url)
+    second = collector._fetch_aws_url(session, url)  # 304, parsed from the cached copy
+    etag_state["status"] = 404
+    third = collector._fetch_aws_url(session, url)  # error, falls back to the cached copy
+
+    assert etag_state["if_none_match"] == [None, '"v1"', '"v1"']
+    for df in (first, second, third):
+        assert list(df["instance_type"]) == ["m7g.large", "m7i.large", "m7a.large"]
+
+
+def test_compact_dtypes_keeps_prices_exact():
+    df = collector._compact_dtypes(pd.DataFrame({"Unit Price (USD)": [0.0123, 1.5], "Currency": ["USD", "USD"]}))
+
+    assert df["Unit Price (USD)"].dtype == "float64"
+    assert df["Unit Price (USD)"].tolist() == [0.0123, 1.5]
+    assert df["Currency"].dtype == "category"
+
+
+def test_fetch_azure_page_honours_retry_after(monkeypatch):
+    statuses = iter([(429, {"Retry-After": "7"}), (503, {}), (200, {})])
+
+    def handler(request):
+        status, headers = next(statuses)
+        return httpx.Response(status, headers=headers, content=b'{"Items": []}')
+
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await collector._fetch_azure_page(
+                client, 0, asyncio.Semaphore(1), collector.AsyncLimiter(1000, 1)
+            )
+
+    monkeypatch.setattr(collector.asyncio, "sleep", fake_sleep)
+    assert asyncio.run(run()) == {"Items": []}
+    assert delays == [7.0, 10]  # Retry-After, then backoff_factor * 2 ** 1
+
+
+def _azure_handler(page_size, total, requested, drop_every=None, missing_skip=None):
+    def handler(request):
+        skip = int(request.url.params["$skip"])
+        requested.append(skip)
+        if skip == missing_skip:
+            return httpx.Response(404)
+        items = [
+            {
+                "armSkuName": "Basic_A1" if drop_every and i % drop_every == 0 else "Standard_D2s_v3",
+                "productName": "Virtual Machines Dsv3 Series",
+                "armRegionName": "eastus",
+                "unitPrice": 0.096,
+                "currencyCode": "USD",
+                "meterRegion": "US East",
+                "serviceFamily": "Compute",
+                "type": "Consumption",
+            }
+            for i in range(skip, min(skip + page_size, total))
+        ]
+        next_page = "next" if skip + page_size < total else None
+        return httpx.Response(200, content=orjson.dumps({"Items": items, "NextPageLink": next_page}))
+
+    return handler
+
+
+def _fetch_azure(handler, limit=2000):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await collector.fetch_azure_vm_pricing(client, limit=limit, requests_per_second=10_000)
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "page_size, drop_every, expected_requests",
+    [
+        (1000, None, 2),  # two pages cover the limit; no speculative batch of 16
+        (100, None, 20),
+        (100, 3, 30),  # a third of each page is dropped client-side, so short pages are refilled
+    ],
+)
+def test_fetch_azure_requests_only_needed_pages(page_size, drop_every, expected_requests):
+    requested = []
+    df = _fetch_azure(_azure_handler(page_size, 100_000, requested, drop_every=drop_every))
+
+    assert len(df) == 2000
+    assert sorted(requested) == [i * page_size for i in range(expected_requests)]
+
+
+def test_fetch_azure_stops_at_failed_page():
+    requested = []
+    df = _fetch_azure(_azure_handler(100, 100_000, requested, missing_skip=500))
+
+    assert len(df) == 500  # pages before the failed one are kept
+    assert max(requested) < 2000  # nothing is fetched beyond the batches already scheduled
+
+
+def test_fetch_azure_stops_at_last_page():
+    requested = []
+    df = _fetch_azure(_azure_handler(100, 450, requested))
+
+    assert len(df) == 450
+    assert 400 in requested
+
+
+def test_filter_azure_items_takes_series_letters():
+    skus = ["Standard_D2s_v3", "Standard_DC2s_v3", "Standard_FX4mds", "Standard_HB120rs_v3", "Basic_A1"]
+    items = [{"armSkuName": sku, "productName": "Virtual Machines"} for sku in skus]
+    cols = {name: [] for name in collector.AZURE_COLUMNS}
+
+    assert collector._filter_azure_items(items, 10, cols) == 4
+    assert cols["Series"] == ["D", "DC", "FX", "HB"]
+
+
+def test_write_parquet_encodes_nested_and_mixed_columns(tmp_path):
+    pricing = {"us-east-1": {"linux": {"ondemand": "0.096", "reserved": {}}}}
+    df = pd.DataFrame({
+        "instance_type": ["m7g.large", "m7i.large"],
+        "pricing": [pricing, None],
+        "GPU": [1, "N/A"],
+        "memory": [8.0, 16.0],
+    })
+    path = tmp_path / "aws_vms.parquet"
+
+    collector.write_parquet(df, path)
+    result = pq.read_table(path).to_pandas()
+
+    assert orjson.loads(result["pricing"][0]) == pricing
+    assert result["pricing"].isna().tolist() == [False, True]
+    assert result["GPU"].tolist() == ["1", "N/A"]
+    assert result["memory"].tolist() == [8.0, 16.0]
+    assert df["pricing"][0] is pricing  # the caller's frame is left untouched